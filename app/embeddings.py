@@ -0,0 +1,42 @@
+"""
+embeddings.py — Shared sentence-transformers model loader.
+
+Both the ingestor and the retriever embed text with the same model;
+loading it here once keeps a single copy in memory per process.
+"""
+
+import os
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# "onnx" runs the graph-optimised export that ships with the model;
+# set EMBEDDING_BACKEND=torch (or openvino on Intel CPUs) to override.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")
+ONNX_FILE_NAME = "onnx/model_O3.onnx"
+
+# ---------------------------------------------------------------------------
+# Singleton model loader (cached across calls in the same process)
+# ---------------------------------------------------------------------------
+_model = None
+
+
+def get_model() -> "SentenceTransformer":
+    global _model
+    if _model is None:
+        # Imported here: pulling in torch takes seconds, so defer it
+        # until an embedding is actually needed.
+        from sentence_transformers import SentenceTransformer
+
+        if EMBEDDING_BACKEND == "onnx":
+            _model = SentenceTransformer(
+                MODEL_NAME,
+                backend="onnx",
+                model_kwargs={"file_name": ONNX_FILE_NAME},
+            )
+        else:
+            _model = SentenceTransformer(MODEL_NAME, backend=EMBEDDING_BACKEND)
+    return _model
@@ -6,15 +6,32 @@ Gemini 2.0 Flash to produce a grounded answer.
 """
 
 import os
+import random
 import time
+from collections.abc import Iterator
+import httpx
 from dotenv import load_dotenv
 from google import genai
+from google.genai import errors, types
 
 load_dotenv()
 
 # ---------------------------------------------------------------------------
 # Configure Gemini
 # ---------------------------------------------------------------------------
+MODEL_NAME = "gemini-2.5-flash-lite-preview-09-2025"
+MAX_OUTPUT_TOKENS = 512
+REQUEST_TIMEOUT_MS = 120_000
+MAX_RETRIES = 5
+MAX_BACKOFF_SECONDS = 60
+# HTTP status codes of transient API errors (rate limit, server errors, overload)
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504, 529})
+
+_GENERATION_CONFIG = types.GenerateContentConfig(
+    max_output_tokens=MAX_OUTPUT_TOKENS,
+    http_options=types.HttpOptions(timeout=REQUEST_TIMEOUT_MS),
+)
+
 _client = None
 
 
@@ -36,25 +53,48 @@ def _get_client():
 # Prompt builder
 # ---------------------------------------------------------------------------
 
+_CHUNK_TEMPLATE = "[Chunk {i} | Page {page} | File: {filename}]\n{text}"
+
+_PROMPT_TEMPLATE = (
+    "Answer the following question using ONLY the context provided below. "
+    "If the answer cannot be found in the context, clearly state that "
+    "the information is not available in the provided document.\n\n"
+    "Context:\n{context}\n\n"
+    "Question: {question}\n\n"
+    "Answer:"
+)
+
+
 def _build_prompt(question: str, chunks: list[dict]) -> str:
     """Construct the RAG prompt with context chunks."""
-    context_parts = []
-    for i, chunk in enumerate(chunks, start=1):
-        context_parts.append(
-            f"[Chunk {i} | Page {chunk.get('page', '?')} | "
-            f"File: {chunk.get('filename', '?')}]\n{chunk.get('text', '')}"
+    context_block = "\n\n".join(
+        _CHUNK_TEMPLATE.format(
+            i=i,
+            page=chunk.get("page", "?"),
+            filename=chunk.get("filename", "?"),
+            text=chunk.get("text", ""),
         )
-    context_block = "\n\n".join(context_parts)
-
-    prompt = (
-        "Answer the following question using ONLY the context provided below. "
-        "If the answer cannot be found in the context, clearly state that "
-        "the information is not available in the provided document.\n\n"
-        f"Context:\n{context_block}\n\n"
-        f"Question: {question}\n\n"
-        "Answer:"
+        for i, chunk in enumerate(chunks, start=1)
+    )
+    return _PROMPT_TEMPLATE.format_map(
+        {"context": context_block, "question": question}
     )
-    return prompt
+
+
+# ---------------------------------------------------------------------------
+# Retry helpers
+# ---------------------------------------------------------------------------
+
+def _is_retryable(error: Exception) -> bool:
+    """Return True if *error* is a transient API failure or a timeout."""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TimeoutException)
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with jitter: ~2-4s, 4-8s, 8-16s, ... capped."""
+    return min(random.uniform(2, 4) * (2 ** attempt), MAX_BACKOFF_SECONDS)
 
 
 # ---------------------------------------------------------------------------
@@ -80,18 +120,48 @@ def generate_answer(question: str, chunks: list[dict]) -> str:
     client = _get_client()
     prompt = _build_prompt(question, chunks)
 
-    # Retry up to 3 times on rate-limit (429) errors
-    max_retries = 3
-    for attempt in range(max_retries):
+    # Retry transient failures with exponential backoff and jitter
+    for attempt in range(MAX_RETRIES):
         try:
             response = client.models.generate_content(
-                model="gemini-2.5-flash-lite-preview-09-2025",
+                model=MODEL_NAME,
                 contents=prompt,
+                config=_GENERATION_CONFIG,
             )
             return response.text
         except Exception as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                wait = 20 * (attempt + 1)  # 20s, 40s, 60s
-                time.sleep(wait)
+            if _is_retryable(e) and attempt < MAX_RETRIES - 1:
+                time.sleep(_backoff(attempt))
+            else:
+                raise
+
+
+def generate_answer_stream(question: str, chunks: list[dict]) -> Iterator[str]:
+    """
+    Stream an answer to *question* grounded on the retrieved *chunks*.
+
+    Yields text fragments as Gemini produces them. Transient failures are
+    retried only until the first fragment has been yielded; after that a
+    retry would repeat text the caller has already shown.
+    """
+    client = _get_client()
+    prompt = _build_prompt(question, chunks)
+
+    for attempt in range(MAX_RETRIES):
+        started = False
+        try:
+            stream = client.models.generate_content_stream(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=_GENERATION_CONFIG,
+            )
+            for part in stream:
+                if part.text:
+                    started = True
+                    yield part.text
+            return
+        except Exception as e:
+            if not started and _is_retryable(e) and attempt < MAX_RETRIES - 1:
+                time.sleep(_backoff(attempt))
             else:
                 raise
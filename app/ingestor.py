@@ -5,88 +5,160 @@ Reads a PDF, splits text into overlapping chunks, generates embeddings,
 and upserts vectors into the Endee vector database.
 """
 
-import uuid
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
 import fitz  # PyMuPDF
-import requests
-from sentence_transformers import SentenceTransformer
-from endee import Endee
+
+from app.embeddings import get_model
+from app.pdftext import extract_pages
+from app.vectorstore import ensure_index, get_index
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
-INDEX_NAME = "documents"
-EMBEDDING_DIM = 384
-CHUNK_SIZE = 500       # characters per chunk
-CHUNK_OVERLAP = 50     # overlapping characters between consecutive chunks
-BATCH_SIZE = 500       # max vectors per upsert call (Endee limit is 1000)
-ENDEE_BASE_URL = "http://localhost:8080/api/v1"
+CHUNK_SIZE = 254          # tokens per chunk (model limit 256 incl. [CLS]/[SEP])
+CHUNK_OVERLAP = 32        # overlapping tokens between consecutive chunks
+BATCH_SIZE = 500          # max vectors per upsert call (Endee limit is 1000)
+ENCODE_BATCH_SIZE = 64    # chunks per encoder forward pass (~12 MB each at 256 tokens)
+MAX_EXTRACT_WORKERS = 4   # processes used for page-level text extraction
+MIN_PARALLEL_PAGES = 200  # below this, extract in-process (pool start-up costs more)
+MAX_UPSERT_WORKERS = 4    # concurrent upsert requests to Endee
+MIN_CHUNK_CHARS = 40      # shorter chunks (stray headers, page numbers) are dropped
 
 # ---------------------------------------------------------------------------
-# Singleton-style model loader (cached across calls in the same process)
+# Embedding model (shared with the retriever)
 # ---------------------------------------------------------------------------
-_model = None
 
-def _get_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _model
+def _get_model() -> "SentenceTransformer":
+    return get_model()
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _pool_context():
+    # Never fork: the Streamlit server (and ONNX Runtime once the model is
+    # warm) runs threads, and forking a threaded process can deadlock.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
 def extract_text_from_pdf(pdf_path: str) -> list[dict]:
-    """Return a list of {'page': int, 'text': str} for every page."""
-    doc = fitz.open(pdf_path)
+    """
+    Return a list of {'page': int, 'text': str} for every page.
+
+    Long PDFs are split into contiguous page ranges extracted in parallel
+    across a small process pool; short ones are read in-process.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    workers = min(os.cpu_count() or 1, MAX_EXTRACT_WORKERS)
+    if page_count < MIN_PARALLEL_PAGES or workers == 1:
+        results = extract_pages((pdf_path, 0, page_count))
+    else:
+        step = -(-page_count // workers)  # ceil division
+        jobs = [
+            (pdf_path, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=len(jobs), mp_context=_pool_context()
+        ) as executor:
+            # map() yields in job order, so pages stay in document order
+            results = [
+                item for part in executor.map(extract_pages, jobs) for item in part
+            ]
+
     pages = []
-    for page_num in range(len(doc)):
-        text = doc[page_num].get_text()
+    for page_num, text in results:
         if text.strip():
             pages.append({"page": page_num + 1, "text": text})
-    doc.close()
     return pages
 
 
 def chunk_text(pages: list[dict], chunk_size: int = CHUNK_SIZE,
-               overlap: int = CHUNK_OVERLAP) -> list[dict]:
+               overlap: int = CHUNK_OVERLAP, tokenizer=None) -> list[dict]:
     """
-    Split page texts into overlapping character-level chunks.
-    Each chunk carries the originating page number.
+    Split page texts into overlapping token-level chunks.
+    Each chunk carries the originating page number and its character
+    offset within that page.
+
+    Windows are measured with the embedding model's tokenizer so chunks
+    fit the encoder; chunk text is sliced from the original page text via
+    token offsets, keeping its casing and whitespace. A trailing remainder
+    that would add fewer than *overlap* new tokens is folded into the last
+    window instead of becoming a chunk that is almost all overlap (the
+    encoder truncates those few extra tokens; the stored text keeps them).
     """
+    if tokenizer is None:
+        tokenizer = _get_model().tokenizer
+    stride = chunk_size - overlap
     chunks = []
     for page_info in pages:
         text = page_info["text"]
         page = page_info["page"]
+        offsets = tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            verbose=False,
+        )["offset_mapping"]
+        if not offsets:
+            continue
+        n_tokens = len(offsets)
         start = 0
-        while start < len(text):
+        while True:
             end = start + chunk_size
-            chunk = text[start:end]
-            chunks.append({"text": chunk, "page": page})
-            start += chunk_size - overlap
+            if n_tokens - end < overlap:
+                end = n_tokens  # last window: absorb the short tail
+            chunks.append({
+                "text": text[offsets[start][0]:offsets[end - 1][1]],
+                "page": page,
+                "start": offsets[start][0],
+            })
+            if end == n_tokens:
+                break
+            start += stride
     return chunks
 
 
-def _ensure_index(client: Endee) -> None:
-    """Create the Endee index if it does not already exist."""
-    # Bypass SDK validation — create index via direct HTTP call
-    # because the SDK expects "int8" but the server expects "int8d"
-    resp = requests.post(
-        f"{ENDEE_BASE_URL}/index/create",
-        headers={"Content-Type": "application/json"},
-        json={
-            "index_name": INDEX_NAME,
-            "dim": EMBEDDING_DIM,
-            "space_type": "cosine",
-            "precision": "int8d",
-            "M": 16,
-            "ef_con": 128,
-        },
-    )
-    # 409 = index already exists, which is fine
-    if resp.status_code == 409:
-        return
-    resp.raise_for_status()
+def _chunk_id(filename: str, chunk: dict) -> str:
+    """
+    Deterministic vector ID for *chunk*, so re-ingesting the same file
+    overwrites its vectors instead of adding duplicates.
+    """
+    key = f"{filename}|{chunk['page']}|{chunk['start']}|{chunk['text'][:64]}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def dedupe_chunks(chunks: list[dict],
+                  min_chars: int = MIN_CHUNK_CHARS) -> list[dict]:
+    """
+    Drop chunks that are too short to be useful and exact repeats of an
+    earlier chunk (e.g. running headers/footers), keeping first occurrences.
+    """
+    seen = set()
+    kept = []
+    for chunk in chunks:
+        text = chunk["text"].strip()
+        if len(text) < min_chars:
+            continue
+        digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        kept.append(chunk)
+    return kept
 
 
 # ---------------------------------------------------------------------------
@@ -114,36 +186,52 @@ def ingest_pdf(pdf_path: str, filename: str) -> int:
     if not pages:
         return 0
 
-    # 2. Chunk
-    chunks = chunk_text(pages)
+    # 2. Chunk (skipping near-empty and repeated chunks)
+    chunks = dedupe_chunks(chunk_text(pages))
     if not chunks:
         return 0
 
     # 3. Embed
     model = _get_model()
     texts = [c["text"] for c in chunks]
-    embeddings = model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
-
-    # 4. Prepare vectors for Endee
-    vectors = []
-    for i, chunk in enumerate(chunks):
-        vectors.append({
-            "id": str(uuid.uuid4()),
-            "vector": embeddings[i].tolist(),
+    # encode() sorts inputs by length before batching and restores the
+    # original order afterwards, so each batch pads to similar lengths.
+    embeddings = model.encode(
+        texts,
+        batch_size=ENCODE_BATCH_SIZE,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+    # 4. Prepare vectors for Endee. Embeddings stay float: the SDK casts
+    #    them to float32 and the server applies its own int8d quantization.
+    vectors = [
+        {
+            "id": _chunk_id(filename, chunk),
+            "vector": vector,
             "meta": {
                 "text": chunk["text"],
                 "page": chunk["page"],
                 "filename": filename,
             },
-        })
-
-    # 5. Upsert into Endee (in batches)
-    client = Endee()  # no token for local dev
-    _ensure_index(client)
-    index = client.get_index(name=INDEX_NAME)
-
-    for start in range(0, len(vectors), BATCH_SIZE):
-        batch = vectors[start : start + BATCH_SIZE]
-        index.upsert(batch)
+        }
+        for vector, chunk in zip(embeddings.tolist(), chunks)
+    ]
+
+    # 5. Upsert into Endee (batches sent concurrently)
+    # The SDK serializes each batch itself: vectors are msgpack-packed as
+    # single-precision floats and metadata is orjson-encoded and zlib-compressed.
+    ensure_index()
+    index = get_index()
+
+    batches = [
+        vectors[start : start + BATCH_SIZE]
+        for start in range(0, len(vectors), BATCH_SIZE)
+    ]
+    with ThreadPoolExecutor(max_workers=MAX_UPSERT_WORKERS) as executor:
+        futures = [executor.submit(index.upsert, batch) for batch in batches]
+        for future in as_completed(futures):
+            future.result()  # re-raise the first upsert failure
 
     return len(vectors)
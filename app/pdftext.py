@@ -0,0 +1,29 @@
+"""
+pdftext.py — Page-range text extraction worker for PDF ingestion.
+
+Deliberately imports nothing but PyMuPDF: process-pool workers import
+this module to unpickle extract_pages, and keeping the embedding and
+Endee stacks out of it keeps worker start-up cheap.
+"""
+
+import fitz  # PyMuPDF
+
+# PyMuPDF's "text" default (TEXTFLAGS_TEXT) minus TEXT_PRESERVE_LIGATURES:
+# ligatures are expanded to plain characters, which suits the embedder.
+# Images are never requested. Unmapped glyphs keep the default CID output.
+TEXT_FLAGS = (
+    fitz.TEXT_PRESERVE_WHITESPACE
+    | fitz.TEXT_MEDIABOX_CLIP
+    | fitz.TEXT_CID_FOR_UNKNOWN_UNICODE
+)
+
+
+def extract_pages(args: tuple[str, int, int]) -> list[tuple[int, str]]:
+    """Open *pdf_path* once and return (page_num, text) for a page range."""
+    pdf_path, start, stop = args
+    # PyMuPDF Document objects cannot be shared across processes
+    with fitz.open(pdf_path) as doc:
+        return [
+            (page_num, doc[page_num].get_text("text", flags=TEXT_FLAGS))
+            for page_num in range(start, stop)
+        ]
@@ -5,14 +5,63 @@ Calls the retriever to find relevant chunks, then passes them to the
 generator to produce a final answer.
 """
 
+import copy
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+
 from app.retriever import retrieve
-from app.generator import generate_answer
+from app.generator import generate_answer, generate_answer_stream
+
+ANSWER_CACHE_SIZE = 256
+
+# ---------------------------------------------------------------------------
+# Answer cache (LRU keyed on the normalised question)
+# ---------------------------------------------------------------------------
+_cache: OrderedDict[str, dict] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(question: str) -> str:
+    return question.strip().lower()
+
+
+def _cache_get(key: str) -> dict | None:
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is None:
+            return None
+        _cache.move_to_end(key)
+    # Hand back a copy so callers can't mutate the cached entry
+    return copy.deepcopy(result)
+
 
+def _cache_put(key: str, result: dict) -> None:
+    result = copy.deepcopy(result)
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        if len(_cache) > ANSWER_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """Drop cached answers, e.g. after new documents have been ingested."""
+    with _cache_lock:
+        _cache.clear()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
 
 def ask(question: str) -> dict:
     """
     Full RAG pipeline: retrieve context → generate answer.
 
+    Repeated questions (ignoring case and surrounding whitespace) are
+    answered from cache.
+
     Parameters
     ----------
     question : str
@@ -26,13 +75,53 @@ def ask(question: str) -> dict:
             "sources": list[dict] # retrieved chunks with text, page, filename, score
         }
     """
+    key = _cache_key(question)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     # Step 1 — Retrieve relevant chunks from Endee
     sources = retrieve(question)
 
     # Step 2 — Generate an answer using Gemini
     answer = generate_answer(question, sources)
 
-    return {
+    result = {
         "answer": answer,
         "sources": sources,
     }
+    _cache_put(key, result)
+    return result
+
+
+def ask_stream(question: str) -> dict:
+    """
+    Like :func:`ask`, but the answer is streamed.
+
+    Retrieval runs eagerly so the sources are available straight away;
+    ``"answer"`` is an iterator of text fragments. The full answer is
+    cached once the stream has been consumed to the end.
+
+    Returns
+    -------
+    dict
+        {
+            "answer": Iterator[str], # LLM-generated answer fragments
+            "sources": list[dict]    # retrieved chunks with text, page, filename, score
+        }
+    """
+    key = _cache_key(question)
+    cached = _cache_get(key)
+    if cached is not None:
+        return {"answer": iter([cached["answer"]]), "sources": cached["sources"]}
+
+    sources = retrieve(question)
+
+    def _stream() -> Iterator[str]:
+        parts = []
+        for text in generate_answer_stream(question, sources):
+            parts.append(text)
+            yield text
+        _cache_put(key, {"answer": "".join(parts), "sources": sources})
+
+    return {"answer": _stream(), "sources": sources}
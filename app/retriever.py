@@ -5,23 +5,33 @@ Embeds the user's question and queries the "documents" index for
 the top-k most similar chunks.
 """
 
-from sentence_transformers import SentenceTransformer
-from endee import Endee
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from app.embeddings import get_model
+from app.vectorstore import get_index
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-INDEX_NAME = "documents"
 TOP_K = 5
+QUERY_CACHE_SIZE = 512
 
 # ---------------------------------------------------------------------------
-# Singleton model loader (reuses the same model instance as ingestor)
+# Embedding model (same instance as the ingestor)
 # ---------------------------------------------------------------------------
-_model = None
 
+def _get_model() -> "SentenceTransformer":
+    return get_model()
 
-def _get_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _model
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _embed_query(question: str) -> tuple[float, ...]:
+    """Embed a normalised question; a tuple so the cached value is immutable."""
+    model = _get_model()
+    return tuple(
+        model.encode(question, show_progress_bar=False, convert_to_numpy=True).tolist()
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -44,14 +54,12 @@ def retrieve(question: str, top_k: int = TOP_K) -> list[dict]:
     list[dict]
         Each dict has keys: text, page, filename, score.
     """
-    # 1. Embed the question
-    model = _get_model()
-    query_vector = model.encode(question, convert_to_numpy=True).tolist()
+    # 1. Embed the question (cached; the model's tokenizer is uncased, so
+    #    lowercasing the key does not change the embedding)
+    query_vector = list(_embed_query(question.strip().lower()))
 
     # 2. Query Endee
-    client = Endee()  # local dev, no token
-    index = client.get_index(name=INDEX_NAME)
-    results = index.query(vector=query_vector, top_k=top_k)
+    results = get_index().query(vector=query_vector, top_k=top_k)
 
     # 3. Format results
     chunks = []
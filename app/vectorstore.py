@@ -0,0 +1,67 @@
+"""
+vectorstore.py — Shared Endee client and "documents" index handle.
+
+The ingestor and retriever both talk to the same index; keeping one
+client here means the connection and index lookup happen once per process.
+"""
+
+import httpx
+from endee import Endee
+
+INDEX_NAME = "documents"
+EMBEDDING_DIM = 384
+ENDEE_BASE_URL = "http://localhost:8080/api/v1"
+
+# ---------------------------------------------------------------------------
+# Direct HTTP client for calls the SDK can't make (index creation)
+# ---------------------------------------------------------------------------
+_http = None
+
+
+def _get_http_client() -> httpx.Client:
+    global _http
+    if _http is None:
+        _http = httpx.Client(base_url=ENDEE_BASE_URL)
+    return _http
+
+
+def ensure_index() -> None:
+    """Create the Endee index if it does not already exist."""
+    # Bypass SDK validation — create index via direct HTTP call
+    # because the SDK expects "int8" but the server expects "int8d"
+    resp = _get_http_client().post(
+        "/index/create",
+        headers={"Content-Type": "application/json"},
+        json={
+            "index_name": INDEX_NAME,
+            "dim": EMBEDDING_DIM,
+            "space_type": "cosine",
+            "precision": "int8d",
+            "M": 16,
+            "ef_con": 128,
+        },
+    )
+    # 409 = index already exists, which is fine
+    if resp.status_code == 409:
+        return
+    resp.raise_for_status()
+
+
+# ---------------------------------------------------------------------------
+# Cached Endee client / index handle
+# ---------------------------------------------------------------------------
+_client = None
+_index = None
+
+
+def get_index():
+    """
+    Return a cached handle to the index. Does not create it; ingestion
+    calls ensure_index() first.
+    """
+    global _client, _index
+    if _index is None:
+        if _client is None:
+            _client = Endee()  # no token for local dev
+        _index = _client.get_index(name=INDEX_NAME)
+    return _index
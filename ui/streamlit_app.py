@@ -14,8 +14,12 @@ import tempfile
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import streamlit as st
-from app.ingestor import ingest_pdf
-from app.pipeline import ask
+from app.embeddings import get_model
+from app.vectorstore import get_index
+
+# app.ingestor / app.pipeline pull in PyMuPDF and the embedding stack, so
+# they are imported inside the handlers below; the page renders without
+# waiting for them.
 
 # ---------------------------------------------------------------------------
 # Page configuration
@@ -29,6 +33,21 @@ st.set_page_config(
 st.title("📄 RAG Document Q&A")
 st.caption("Upload a PDF, then ask natural-language questions about it.")
 
+# ---------------------------------------------------------------------------
+# Shared resources (loaded once per server process, reused across reruns)
+# ---------------------------------------------------------------------------
+@st.cache_resource
+def _embedder():
+    """Load the embedding model once per server process."""
+    return get_model()
+
+
+@st.cache_resource
+def _endee():
+    """Connect to Endee and resolve the index handle once per server process."""
+    return get_index()
+
+
 # ---------------------------------------------------------------------------
 # Sidebar — PDF Upload & Ingestion
 # ---------------------------------------------------------------------------
@@ -51,7 +70,11 @@ with st.sidebar:
                     tmp_path = tmp.name
 
                 try:
+                    from app.ingestor import ingest_pdf
+                    from app.pipeline import clear_cache
+
                     num_chunks = ingest_pdf(tmp_path, uploaded_file.name)
+                    clear_cache()  # cached answers may not reflect the new document
                     st.success(
                         f"✅ Ingested **{num_chunks}** chunks from "
                         f"**{uploaded_file.name}** into the vector database."
@@ -84,16 +107,22 @@ if st.button("🚀 Get Answer", use_container_width=True):
     if not question.strip():
         st.warning("Please enter a question first.")
     else:
-        with st.spinner("Searching documents and generating answer..."):
+        with st.spinner("Searching documents..."):
             try:
-                result = ask(question)
+                from app.pipeline import ask_stream
+
+                result = ask_stream(question)
             except Exception as e:
                 st.error(f"Something went wrong: {e}")
                 st.stop()
 
-        # ----- Display answer -----
+        # ----- Display answer (streamed as Gemini generates it) -----
         st.markdown("### 💡 Answer")
-        st.markdown(result["answer"])
+        try:
+            st.write_stream(result["answer"])
+        except Exception as e:
+            st.error(f"Something went wrong: {e}")
+            st.stop()
 
         # ----- Display source chunks -----
         st.markdown("---")
@@ -112,3 +141,16 @@ if st.button("🚀 Get Answer", use_container_width=True):
                 )
                 with st.expander(label):
                     st.write(chunk["text"])
+
+# ---------------------------------------------------------------------------
+# Warm-up — runs after the page has rendered so the first load stays fast
+# ---------------------------------------------------------------------------
+_embedder()
+try:
+    _endee()
+except Exception as e:
+    # Not cached on failure, so a later rerun retries
+    st.warning(
+        "The Endee index is not available yet — make sure Endee is running "
+        f"and ingest a document first. ({e})"
+    )